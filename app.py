@@ -1,7 +1,17 @@
 from flask import Flask, render_template, request, jsonify, session
+import click
+from werkzeug.middleware.proxy_fix import ProxyFix
 import random
+import sqlite3
+import struct
+import threading
+import time
+from functools import wraps
+from itertools import combinations, combinations_with_replacement, permutations
 from treys import Card, Deck, Evaluator
+from treys.lookup import LookupTable
 import json
+import multiprocessing
 from datetime import datetime
 import os
 import tempfile
@@ -37,6 +47,85 @@ HAND_RANKS = {
     9: "High Card"
 }
 
+# Game variants. 'hole_used' lists how many hole cards may be combined with
+# board cards to make the best five-card hand: any number in Hold'em, exactly
+# two in Omaha.
+GAME_VARIANTS = {
+    'holdem': {'name': "Texas Hold'em", 'hole_cards': 2, 'hole_used': (0, 1, 2), 'max_players': 10},
+    'plo': {'name': 'Pot-Limit Omaha', 'hole_cards': 4, 'hole_used': (2,), 'max_players': 10}
+}
+DEFAULT_VARIANT = 'holdem'
+MIN_PLAYERS = 2
+
+# Precomputed combination indexes so the simulation loop never calls
+# itertools: hole combinations per variant and number of hole cards used,
+# board combinations per (board size, number of board cards used).
+# PLO on the river is 6 hole pairs x 10 board triples = 60 hands per player.
+HOLE_INDEXES = {
+    key: {used: tuple(combinations(range(v['hole_cards']), used)) for used in v['hole_used']}
+    for key, v in GAME_VARIANTS.items()
+}
+BOARD_INDEXES = {
+    (size, used): tuple(combinations(range(size), used))
+    for size in range(3, 6) for used in range(0, size + 1)
+}
+
+# Building the treys lookup tables is expensive, so share one evaluator
+EVALUATOR = Evaluator()
+
+# Equity cache shared by all worker processes through SQLite in WAL mode.
+# Set EQUITY_CACHE_PATH to an empty string to disable it.
+EQUITY_CACHE_PATH = os.environ.get('EQUITY_CACHE_PATH', os.path.join(app.instance_path, 'equity_cache.sqlite3'))
+EQUITY_CACHE_MAX_ENTRIES = int(os.environ.get('EQUITY_CACHE_MAX_ENTRIES', 200000))
+EQUITY_CACHE_EVICT_INTERVAL = 256  # Inserts per process between eviction passes
+EQUITY_CACHE_TOUCH_INTERVAL = 600  # Seconds before a hit refreshes an entry's last_used
+
+# Admission control for simulation work (per worker process): at most
+# SIMULATION_WORKERS simulations run at once, up to SIMULATION_QUEUE_SIZE more
+# requests wait, and anything beyond that is shed with 429 + Retry-After.
+# Admitted requests must stay below the server's threads per process
+# (SERVER_THREADS, also read by gunicorn.conf.py) so cheap endpoints always
+# have a free thread.
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 8))
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', 2))
+SIMULATION_QUEUE_SIZE = int(os.environ.get('SIMULATION_QUEUE_SIZE', 4))
+if SIMULATION_WORKERS < 1 or SIMULATION_WORKERS + SIMULATION_QUEUE_SIZE >= SERVER_THREADS:
+    raise RuntimeError(
+        f'SIMULATION_WORKERS + SIMULATION_QUEUE_SIZE ({SIMULATION_WORKERS + SIMULATION_QUEUE_SIZE}) '
+        f'must be positive and below SERVER_THREADS ({SERVER_THREADS})'
+    )
+SIMULATION_RETRY_AFTER = 2  # seconds
+MAX_SIMULATIONS_PER_REQUEST = 100000
+# Samples each client may have simulated through /simulate per budget window.
+# Clients are keyed by address; behind a reverse proxy set TRUSTED_PROXIES to
+# the number of proxies so the address comes from X-Forwarded-For instead of
+# every client sharing the proxy's budget.
+CLIENT_SIMULATION_BUDGET = int(os.environ.get('CLIENT_SIMULATION_BUDGET', 1000000))
+CLIENT_BUDGET_WINDOW = 60  # seconds
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
+
+# Preflop equity table built by `flask build-preflop-table` and loaded on
+# first use. Equities are stored as little-endian uint16 basis points.
+PREFLOP_TABLE_PATH = os.environ.get('PREFLOP_TABLE_PATH', os.path.join(app.root_path, 'data', 'preflop_equity.bin'))
+PREFLOP_TABLE_MAGIC = b'PFEQ'
+PREFLOP_TABLE_VERSION = 2
+PREFLOP_TABLE_HEADER = '<4sBBH'  # magic, version, max opponents, number of hand classes
+PREFLOP_MAX_OPPONENTS = max(v['max_players'] for v in GAME_VARIANTS.values()) - 1
+
+# The 169 starting hand classes on the usual 13x13 grid (ace first): pairs on
+# the diagonal, suited hands above it, offsuit hands below it
+RANKS_DESCENDING = VALID_RANKS[::-1]
+HAND_CLASSES = [
+    rank1 + rank2 if row == col else rank1 + rank2 + 's' if row < col else rank2 + rank1 + 'o'
+    for row, rank1 in enumerate(RANKS_DESCENDING)
+    for col, rank2 in enumerate(RANKS_DESCENDING)
+]
+
+# Every relabelling of the four suits, for canonicalizing spots
+SUIT_PERMUTATIONS = [dict(zip(VALID_SUITS, perm)) for perm in permutations(VALID_SUITS)]
+
 def parse_card(card_str):
     card_str = card_str.strip().upper()
     if len(card_str) != 2:
@@ -50,40 +139,55 @@ def get_unicode_card(card):
     rank, suit = card[0], card[1]
     return f"{rank}{SUIT_SYMBOLS[suit]}"
 
-def calculate_hand_strength(hand):
-    """Calculate initial hand strength (0-100) for pricing"""
-    evaluator = Evaluator()
-    
-    # Create a simple strength calculation based on card ranks
-    rank_values = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7, '8': 8, '9': 9, 
-                   'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
-    
-    card1, card2 = hand[0], hand[1]
-    rank1, rank2 = card1[0], card2[0]
-    suit1, suit2 = card1[1], card2[1]
-    
-    # Base strength from card values
-    strength = (rank_values[rank1] + rank_values[rank2]) / 2
-    
-    # Bonus for suited cards
-    if suit1 == suit2:
-        strength += 10
-    
-    # Bonus for pairs
-    if rank1 == rank2:
-        strength += 20
-    
-    # Bonus for high cards
-    if rank1 in ['A', 'K', 'Q', 'J'] or rank2 in ['A', 'K', 'Q', 'J']:
-        strength += 5
-    
-    # Bonus for connected cards
-    rank1_val = rank_values[rank1]
-    rank2_val = rank_values[rank2]
-    if abs(rank1_val - rank2_val) <= 2:
-        strength += 5
-    
-    return min(100, max(0, strength))
+def calculate_hand_strength(hand, opponents=1):
+    """Preflop all-in equity (%) of a dealt hand against random opponents, or None without a table entry (e.g. Omaha)"""
+    return preflop_equity(hand, opponents)
+
+def hand_class_index(hand):
+    """Index into HAND_CLASSES for two hole cards, e.g. ['AH', 'KH'] -> AKs"""
+    high, low = sorted(RANKS_DESCENDING.index(card[0].upper()) for card in hand)
+    if hand[0][1].lower() == hand[1][1].lower():
+        return high * 13 + low
+    return low * 13 + high
+
+def hand_class_combos(hand_class):
+    """All concrete hands (e.g. ['AS', 'KS']) of a starting hand class like 'AKs'"""
+    rank1, rank2 = hand_class[0], hand_class[1]
+    suited = hand_class.endswith('s')
+    combos = []
+    for i, suit1 in enumerate('SHDC'):
+        for j, suit2 in enumerate('SHDC'):
+            if (suit1 == suit2) != suited or (rank1 == rank2 and j <= i):
+                continue
+            combos.append([rank1 + suit1, rank2 + suit2])
+    return combos
+
+_preflop_table = None
+
+def load_preflop_table():
+    """Load the preflop equity table on first use; returns None if it is unavailable"""
+    global _preflop_table
+    if _preflop_table is None:
+        try:
+            with open(PREFLOP_TABLE_PATH, 'rb') as f:
+                data = f.read()
+            magic, version, max_opponents, num_classes = struct.unpack_from(PREFLOP_TABLE_HEADER, data)
+            if magic != PREFLOP_TABLE_MAGIC or version != PREFLOP_TABLE_VERSION or num_classes != len(HAND_CLASSES):
+                raise ValueError('unrecognized table format')
+            offset = struct.calcsize(PREFLOP_TABLE_HEADER)
+            vs_random = struct.unpack_from(f'<{num_classes * max_opponents}H', data, offset)
+            _preflop_table = {'max_opponents': max_opponents, 'vs_random': vs_random}
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Preflop equity table unavailable: {str(e)}")
+            _preflop_table = False
+    return _preflop_table or None
+
+def preflop_equity(hand, opponents=1):
+    """All-in equity (%) of two hole cards against random opponents, or None without a table entry"""
+    table = load_preflop_table()
+    if table is None or len(hand) != 2 or not 1 <= opponents <= table['max_opponents']:
+        return None
+    return table['vs_random'][hand_class_index(hand) * table['max_opponents'] + opponents - 1] / 100
 
 def calculate_hand_price(strength, community_cards=[]):
     """Calculate hand price based on strength and community cards"""
@@ -108,6 +212,8 @@ def validate_session_state():
         session['full_game_history'] = []
     if 'leverage' not in session:
         session['leverage'] = 1
+    if session.get('variant') not in GAME_VARIANTS:
+        session['variant'] = DEFAULT_VARIANT
     
     # Clean up orphaned state
     hands = session.get('hands', [])
@@ -122,60 +228,97 @@ def validate_session_state():
         
     return True
 
-def simulate_win_probabilities(player_hands, community_cards=[], simulations=10000):
+def get_variant(variant):
+    """Look up a game variant by key; returns None for unknown variants"""
+    if not isinstance(variant, str):
+        return None
+    return GAME_VARIANTS.get(variant)
+
+def cards_to_treys(cards):
+    """Convert cards from uppercase format (AH) to treys integers"""
+    return [Card.new(card[0] + card[1].lower()) for card in cards]
+
+def combo_partials(cards, index_sets):
+    """Precompute (suit mask, prime product) for each combination of cards.
+
+    A five-card hand is a flush when the AND of its suit bits is non-zero,
+    and its treys lookup key is the product of its rank primes, so a hole
+    part and a board part can be combined with one AND and one multiply.
+    """
+    partials = []
+    for indexes in index_sets:
+        mask = 0xF000
+        prime = 1
+        for i in indexes:
+            mask &= cards[i]
+            prime *= cards[i] & 0x3F
+        partials.append((mask, prime))
+    return partials
+
+def prepare_hands(player_hands_eval, variant=DEFAULT_VARIANT):
+    """Precompute the board-independent part of every player's hands"""
+    hole_indexes = HOLE_INDEXES[variant]
+    return [
+        {used: combo_partials(hand, indexes) for used, indexes in hole_indexes.items()}
+        for hand in player_hands_eval
+    ]
+
+def score_hands(prepared_hands, board, variant=DEFAULT_VARIANT):
+    """Score every player on one board (treys ranks, lower is better).
+
+    Board combinations are built once and shared by all players, so each
+    player only pays for table lookups.
+    """
+    flush_lookup = EVALUATOR.table.flush_lookup
+    unsuited_lookup = EVALUATOR.table.unsuited_lookup
+    board_size = len(board)
+    
+    groups = []
+    for used in GAME_VARIANTS[variant]['hole_used']:
+        if 5 - used <= board_size:
+            groups.append((used, combo_partials(board, BOARD_INDEXES[(board_size, 5 - used)])))
+    
+    scores = []
+    for hand in prepared_hands:
+        best = LookupTable.MAX_HIGH_CARD
+        for used, board_partials in groups:
+            for hole_mask, hole_prime in hand[used]:
+                for board_mask, board_prime in board_partials:
+                    prime = hole_prime * board_prime
+                    if hole_mask & board_mask:
+                        score = flush_lookup[prime]
+                    else:
+                        score = unsuited_lookup[prime]
+                    if score < best:
+                        best = score
+        scores.append(best)
+    return scores
+
+def simulate_win_probabilities(player_hands, community_cards=[], simulations=10000, variant=DEFAULT_VARIANT):
     num_players = len(player_hands)
     wins = [0] * num_players
 
-    evaluator = Evaluator()
-    
-    # Convert cards from uppercase format (AH) to treys format (Ah)
-    player_hands_eval = []
-    for hand in player_hands:
-        hand_eval = []
-        for card in hand:
-            # Convert 'AH' -> 'Ah' for treys
-            card_treys = card[0] + card[1].lower()
-            hand_eval.append(Card.new(card_treys))
-        player_hands_eval.append(hand_eval)
-    
-    community_eval = []
-    for card in community_cards:
-        # Convert 'AH' -> 'Ah' for treys
-        card_treys = card[0] + card[1].lower()
-        community_eval.append(Card.new(card_treys))
-
-    known_cards = [card for hand in player_hands_eval for card in hand] + community_eval
+    player_hands_eval = [cards_to_treys(hand) for hand in player_hands]
+    community_eval = cards_to_treys(community_cards)
+    prepared_hands = prepare_hands(player_hands_eval, variant)
+
+    known_cards = set(card for hand in player_hands_eval for card in hand) | set(community_eval)
     remaining_cards_needed = 5 - len(community_cards)
 
     # If all community cards are dealt, just evaluate the hands once
     if remaining_cards_needed == 0:
-        scores = [evaluator.evaluate(hand, community_eval) for hand in player_hands_eval]
+        scores = score_hands(prepared_hands, community_eval, variant)
         best = min(scores)
         winners = [i for i, score in enumerate(scores) if score == best]
         for w in winners:
             wins[w] = simulations / len(winners)
     else:
-        # Run simulations for remaining unknown cards
+        # Build the remaining deck once and sample runouts from it
+        remaining_deck = [card for card in Deck.GetFullDeck() if card not in known_cards]
+        
         for _ in range(simulations):
-            deck = Deck()
-            # Remove known cards from deck - create new list instead of removing from existing
-            remaining_deck = []
-            for card_obj in deck.cards:
-                if card_obj not in known_cards:
-                    remaining_deck.append(card_obj)
-            
-            # Draw only the remaining unknown cards from the filtered deck
-            if len(remaining_deck) >= remaining_cards_needed:
-                random.shuffle(remaining_deck)
-                simulated_board = community_eval + remaining_deck[:remaining_cards_needed]
-            else:
-                # Fallback if not enough cards (shouldn't happen in normal play)
-                simulated_board = community_eval
-
-            scores = [
-                evaluator.evaluate(hand, simulated_board)
-                for hand in player_hands_eval
-            ]
+            simulated_board = community_eval + random.sample(remaining_deck, remaining_cards_needed)
+            scores = score_hands(prepared_hands, simulated_board, variant)
             best = min(scores)
             winners = [i for i, score in enumerate(scores) if score == best]
             for w in winners:
@@ -183,20 +326,327 @@ def simulate_win_probabilities(player_hands, community_cards=[], simulations=100
 
     return [round(w / simulations * 100, 2) for w in wins]
 
+def board_standings(prepared_hands, board, variant=DEFAULT_VARIANT):
+    """Each player's standing on a board as it is: 'win', 'tie' or 'lose'"""
+    scores = score_hands(prepared_hands, board, variant)
+    best = min(scores)
+    num_best = scores.count(best)
+    return [
+        'lose' if score != best else 'win' if num_best == 1 else 'tie'
+        for score in scores
+    ]
+
+# Order of standings, for deciding whether a card improves a player's position
+STANDING_RANKS = {'lose': 0, 'tie': 1, 'win': 2}
+
+def next_card_breakdown(player_hands, community_cards, variant=DEFAULT_VARIANT):
+    """Exact per-card breakdown of the next community card on the flop or turn.
+
+    Every remaining river card (turn) or every unordered turn/river pair
+    (flop) is evaluated once; on the flop each pair counts towards both of
+    its cards as the turn card. A card is an out for a player when the
+    board it makes moves them from behind to winning or sharing, or from
+    sharing to winning, compared with their standing on the current board.
+    Returns None before the flop and once the river is dealt.
+    """
+    if len(community_cards) not in (3, 4):
+        return None
+    
+    num_players = len(player_hands)
+    player_hands_eval = [cards_to_treys(hand) for hand in player_hands]
+    community_eval = cards_to_treys(community_cards)
+    prepared_hands = prepare_hands(player_hands_eval, variant)
+    
+    known_cards = set(card for hand in player_hands_eval for card in hand) | set(community_eval)
+    remaining_deck = [card for card in Deck.GetFullDeck() if card not in known_cards]
+    shares = {card: [0.0] * num_players for card in remaining_deck}
+    
+    def add_shares(board, next_cards):
+        scores = score_hands(prepared_hands, board, variant)
+        best = min(scores)
+        winners = [i for i, score in enumerate(scores) if score == best]
+        for card in next_cards:
+            for w in winners:
+                shares[card][w] += 1 / len(winners)
+    
+    if len(community_eval) == 4:
+        runouts_per_card = 1
+        for card in remaining_deck:
+            add_shares(community_eval + [card], (card,))
+    else:
+        runouts_per_card = len(remaining_deck) - 1
+        for turn, river in combinations(remaining_deck, 2):
+            add_shares(community_eval + [turn, river], (turn, river))
+    
+    card_equities = {
+        card: [share / runouts_per_card * 100 for share in card_shares]
+        for card, card_shares in shares.items()
+    }
+    equities = [
+        sum(equity[i] for equity in card_equities.values()) / len(remaining_deck)
+        for i in range(num_players)
+    ]
+    
+    standings = board_standings(prepared_hands, community_eval, variant)
+    runouts = []
+    outs = [[] for _ in range(num_players)]
+    for card in remaining_deck:
+        card_str = Card.int_to_str(card).upper()
+        card_standings = board_standings(prepared_hands, community_eval + [card], variant)
+        runouts.append({
+            'card': card_str,
+            'equities': [round(e, 2) for e in card_equities[card]],
+            'status': card_standings
+        })
+        for i in range(num_players):
+            if STANDING_RANKS[card_standings[i]] > STANDING_RANKS[standings[i]]:
+                outs[i].append(card_str)
+    
+    return {
+        'equities': [round(e, 2) for e in equities],
+        'status': standings,
+        'runouts': runouts,
+        'outs': outs
+    }
+
+def canonical_state(player_hands, community_cards, variant=DEFAULT_VARIANT):
+    """Build a canonical cache key for a spot.
+
+    Card order within a hand and on the board, player order and suit labels
+    do not change equities, so all of them are normalized away. Returns the
+    key and the original player index for each canonical position.
+    """
+    best_key, best_order = None, None
+    for mapping in SUIT_PERMUTATIONS:
+        hands = [
+            ''.join(sorted(card[0].upper() + mapping[card[1].lower()] for card in hand))
+            for hand in player_hands
+        ]
+        board = ''.join(sorted(card[0].upper() + mapping[card[1].lower()] for card in community_cards))
+        order = sorted(range(len(hands)), key=hands.__getitem__)
+        key = f"{variant}|{','.join(hands[i] for i in order)}|{board}"
+        if best_key is None or key < best_key:
+            best_key, best_order = key, order
+    return best_key, best_order
+
+_simulation_slots = threading.BoundedSemaphore(SIMULATION_WORKERS)
+_admission_lock = threading.Lock()
+_admitted_requests = 0
+
+def admission_controlled(view):
+    """Shed expensive requests with 429 once the simulation queue is full"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        global _admitted_requests
+        with _admission_lock:
+            if _admitted_requests >= SIMULATION_WORKERS + SIMULATION_QUEUE_SIZE:
+                return server_busy_response(SIMULATION_RETRY_AFTER)
+            _admitted_requests += 1
+        try:
+            return view(*args, **kwargs)
+        finally:
+            with _admission_lock:
+                _admitted_requests -= 1
+    return wrapper
+
+def server_busy_response(retry_after, error='Server busy, please retry shortly'):
+    response = jsonify({'error': error})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+_client_usage_lock = threading.Lock()
+_client_usage = {}  # client address -> [window start, samples used]
+
+def client_usage(client, now):
+    """Current [window start, samples used] for a client; caller holds _client_usage_lock"""
+    # Forget clients whose window has expired so the table stays small
+    if len(_client_usage) > 10000:
+        for key in [k for k, (start, _) in _client_usage.items() if now - start >= CLIENT_BUDGET_WINDOW]:
+            del _client_usage[key]
+    
+    usage = _client_usage.get(client)
+    if usage is None or now - usage[0] >= CLIENT_BUDGET_WINDOW:
+        usage = _client_usage[client] = [now, 0]
+    return usage
+
+def client_budget_retry_after(client, simulations):
+    """Check whether `simulations` more samples fit in a client's budget.
+
+    Returns None when they fit, otherwise the number of seconds until the
+    window resets. Nothing is charged here: only samples that are actually
+    simulated are charged, by charge_client_simulations.
+    """
+    now = time.time()
+    with _client_usage_lock:
+        usage = client_usage(client, now)
+        if usage[1] + simulations > CLIENT_SIMULATION_BUDGET:
+            return max(1, int(usage[0] + CLIENT_BUDGET_WINDOW - now + 1))
+        return None
+
+def charge_client_simulations(client, simulations):
+    """Charge simulated samples to a client's budget"""
+    with _client_usage_lock:
+        client_usage(client, time.time())[1] += simulations
+
+_inflight_lock = threading.Lock()
+_inflight_calls = {}
+
+def coalesce(key, compute):
+    """Run compute() once for concurrent callers with the same key; all share its result"""
+    with _inflight_lock:
+        call = _inflight_calls.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight_calls[key] = {'done': threading.Event(), 'result': None, 'error': None}
+    
+    if not leader:
+        call['done'].wait()
+        if call['error'] is not None:
+            raise call['error']
+        return call['result']
+    
+    try:
+        call['result'] = compute()
+    except Exception as e:
+        call['error'] = e
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight_calls[key]
+        call['done'].set()
+    return call['result']
+
+_cache_local = threading.local()
+
+def get_cache_connection():
+    """Return this thread's connection to the equity cache, opening it if needed"""
+    conn = getattr(_cache_local, 'conn', None)
+    # Connections must not be shared across a fork (e.g. gunicorn --preload)
+    if conn is not None and _cache_local.pid == os.getpid():
+        return conn
+    
+    os.makedirs(os.path.dirname(EQUITY_CACHE_PATH) or '.', exist_ok=True)
+    conn = sqlite3.connect(EQUITY_CACHE_PATH, timeout=5, isolation_level=None)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS equity_cache ('
+        'state TEXT NOT NULL, samples INTEGER NOT NULL, equities TEXT NOT NULL, '
+        'last_used REAL NOT NULL, PRIMARY KEY (state, samples))'
+    )
+    conn.execute('CREATE INDEX IF NOT EXISTS equity_cache_last_used ON equity_cache (last_used)')
+    _cache_local.conn = conn
+    _cache_local.pid = os.getpid()
+    _cache_local.inserts = 0
+    return conn
+
+def get_cached_equities(state, simulations):
+    """Look up equities for a canonical state computed with at least `simulations` samples"""
+    conn = get_cache_connection()
+    row = conn.execute(
+        'SELECT samples, equities, last_used FROM equity_cache WHERE state = ? AND samples >= ? '
+        'ORDER BY samples LIMIT 1',
+        (state, simulations)
+    ).fetchone()
+    if row is None:
+        return None
+    
+    # Only refresh stale entries so hot hits stay read-only and never wait on
+    # the write lock; LRU eviction only needs last_used to this resolution
+    now = time.time()
+    if now - row[2] >= EQUITY_CACHE_TOUCH_INTERVAL:
+        conn.execute(
+            'UPDATE equity_cache SET last_used = ? WHERE state = ? AND samples = ?',
+            (now, state, row[0])
+        )
+    return row[0], json.loads(row[1])
+
+def store_cached_equities(state, simulations, equities):
+    """Store equities for a canonical state and evict least recently used entries"""
+    conn = get_cache_connection()
+    conn.execute(
+        'INSERT OR REPLACE INTO equity_cache (state, samples, equities, last_used) VALUES (?, ?, ?, ?)',
+        (state, simulations, json.dumps(equities), time.time())
+    )
+    _cache_local.inserts += 1
+    if _cache_local.inserts % EQUITY_CACHE_EVICT_INTERVAL == 0:
+        evict_cached_equities(conn)
+
+def evict_cached_equities(conn):
+    """Trim the cache to EQUITY_CACHE_MAX_ENTRIES, dropping the least recently used spots"""
+    count = conn.execute('SELECT COUNT(*) FROM equity_cache').fetchone()[0]
+    if count > EQUITY_CACHE_MAX_ENTRIES:
+        conn.execute(
+            'DELETE FROM equity_cache WHERE rowid IN '
+            '(SELECT rowid FROM equity_cache ORDER BY last_used LIMIT ?)',
+            (count - EQUITY_CACHE_MAX_ENTRIES,)
+        )
+
+def canonical_equities(state, order, player_hands, community_cards, simulations, variant, client=None):
+    """Samples and equities (in canonical player order) from the cache, simulating on a miss.
+
+    A simulation is charged to `client`'s budget when one is given.
+    """
+    if EQUITY_CACHE_PATH:
+        try:
+            cached = get_cached_equities(state, simulations)
+            if cached is not None:
+                return cached
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error reading equity cache: {str(e)}")
+    
+    with _simulation_slots:
+        probabilities = simulate_win_probabilities(player_hands, community_cards, simulations, variant)
+    if client is not None:
+        charge_client_simulations(client, simulations)
+    canonical_probabilities = [probabilities[player] for player in order]
+    
+    if EQUITY_CACHE_PATH:
+        try:
+            store_cached_equities(state, simulations, canonical_probabilities)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error writing equity cache: {str(e)}")
+    return simulations, canonical_probabilities
+
+def cached_win_probabilities(player_hands, community_cards=[], simulations=10000, variant=DEFAULT_VARIANT, client=None):
+    """Win probabilities through the shared equity cache.
+
+    Concurrent requests for the same canonical spot are coalesced into one
+    computation, and only the client whose request runs it is charged for
+    the samples. Returns the probabilities and the number of samples behind
+    them, which can exceed `simulations` when a more accurate result was
+    already cached.
+    """
+    # River spots are evaluated exactly and are cheaper than a cache round trip
+    if len(community_cards) >= 5:
+        return simulate_win_probabilities(player_hands, community_cards, simulations, variant), simulations
+    
+    state, order = canonical_state(player_hands, community_cards, variant)
+    samples, canonical_probabilities = coalesce(
+        (state, simulations),
+        lambda: canonical_equities(state, order, player_hands, community_cards, simulations, variant, client)
+    )
+    
+    probabilities = [0] * len(player_hands)
+    for position, player in enumerate(order):
+        probabilities[player] = canonical_probabilities[position]
+    return probabilities, samples
+
 def normalize_card(card):
     # Converts 'AH' -> 'Ah', 'TD' -> 'Td', etc.
     rank = card[0].upper()
     suit = card[1].lower()
     return rank + suit
 
-def generate_random_hands(num_players=6):
+def generate_random_hands(num_players=6, variant=DEFAULT_VARIANT):
     """Generate random hands for the trading game"""
     deck = Deck()
     hands = []
     
     for _ in range(num_players):
         hand = []
-        for _ in range(2):
+        for _ in range(GAME_VARIANTS[variant]['hole_cards']):
             card = deck.draw(1)[0]
             # Convert to uppercase format for frontend (e.g., 'AH' instead of 'Ah')
             card_str = Card.int_to_str(card).upper()
@@ -220,14 +670,23 @@ def get_game_state():
         'owned_hand': session.get('owned_hand'),
         'game_history': session.get('game_history', []),
         'full_game_history': session.get('full_game_history', []),
-        'leverage': session.get('leverage', 1)
+        'leverage': session.get('leverage', 1),
+        'variant': session.get('variant', DEFAULT_VARIANT)
     })
 
 @app.route('/api/generate-hands', methods=['POST'])
+@admission_controlled
 def generate_hands():
     """Generate random hands for trading and initialize deck and community cards in session. Subtract $10 fee and refund current hand."""
     data = request.get_json()
     num_players = data.get('num_players', 6)
+    variant = data.get('variant') or DEFAULT_VARIANT
+    
+    game_variant = get_variant(variant)
+    if game_variant is None:
+        return jsonify({'error': f'Unknown game variant: {variant}'}), 400
+    if type(num_players) is not int or num_players < MIN_PLAYERS or num_players > game_variant['max_players']:
+        return jsonify({'error': f"Number of players must be between {MIN_PLAYERS} and {game_variant['max_players']}"}), 400
     
     try:
         # Validate session state first
@@ -288,11 +747,12 @@ def generate_hands():
         if len(session['game_history']) > 20:
             session['game_history'] = session['game_history'][-20:]
         
-        hands = generate_random_hands(num_players)
+        hands = generate_random_hands(num_players, variant)
         
         # Store hands and community cards in session first (needed for consistent pricing)
         session['hands'] = hands
         session['community_cards'] = []
+        session['variant'] = variant
         
         # Use the same consistent pricing function
         buy_prices, sell_prices, probabilities = get_dynamic_hand_prices_and_probs()
@@ -302,11 +762,11 @@ def generate_hands():
             hand_data.append({
                 'player': i + 1,
                 'cards': hand,
-                'strength': calculate_hand_strength(hand),
+                'strength': calculate_hand_strength(hand, len(hands) - 1),
                 'price': buy_prices[i] if i < len(buy_prices) else 0,
                 'sell_price': sell_prices[i] if i < len(sell_prices) else 0,
                 'probability': probabilities[i] if i < len(probabilities) else 0,
-                'hand_type': get_hand_type([hand], [])[0]
+                'hand_type': get_hand_type([hand], [], variant)[0]
             })
         
         # Store deck for auto dealing
@@ -336,7 +796,8 @@ def generate_hands():
             'owned_hand': session['owned_hand'],
             'game_history': session['game_history'],
             'full_game_history': session['full_game_history'],
-            'refund_amount': refund_amount if refund_amount > 0 else None
+            'refund_amount': refund_amount if refund_amount > 0 else None,
+            'variant': variant
         })
         
     except Exception as e:
@@ -346,6 +807,7 @@ def generate_hands():
         return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/api/buy-hand', methods=['POST'])
+@admission_controlled
 def buy_hand():
     data = request.get_json()
     player_index = data.get('player_index')
@@ -384,7 +846,7 @@ def buy_hand():
         # Get hand type if community cards exist
         hand_type = None
         if community_cards:
-            hand_types = get_hand_type([hands[player_index]], community_cards)
+            hand_types = get_hand_type([hands[player_index]], community_cards, session['variant'])
             hand_type = hand_types[0]['name'] if hand_types else None
         
         # Add transaction to both histories
@@ -531,11 +993,18 @@ def reset_game():
     })
 
 @app.route('/simulate', methods=['POST'])
+@admission_controlled
 def simulate():
     data = request.get_json()
     player_hands = data.get('player_hands', [])
     community_cards = data.get('community_cards', [])
     simulations = data.get('simulations', 10000)
+    variant = data.get('variant') or DEFAULT_VARIANT
+    include_breakdown = data.get('breakdown', False)
+    
+    game_variant = get_variant(variant)
+    if game_variant is None:
+        return jsonify({'error': f'Unknown game variant: {variant}'}), 400
     
     # Normalize all cards
     try:
@@ -545,8 +1014,20 @@ def simulate():
         return jsonify({'error': f'Invalid card format: {e}'}), 400
     
     # Validate input
-    if len(player_hands) < 2:
-        return jsonify({'error': 'Need at least 2 players'}), 400
+    if len(player_hands) < MIN_PLAYERS:
+        return jsonify({'error': f'Need at least {MIN_PLAYERS} players'}), 400
+    
+    if len(player_hands) > game_variant['max_players']:
+        return jsonify({'error': f"At most {game_variant['max_players']} players allowed"}), 400
+    
+    if any(len(hand) != game_variant['hole_cards'] for hand in player_hands):
+        return jsonify({'error': f"Each player needs exactly {game_variant['hole_cards']} cards for {game_variant['name']}"}), 400
+    
+    if len(community_cards) > 5:
+        return jsonify({'error': 'At most 5 community cards allowed'}), 400
+    
+    if type(simulations) is not int or simulations < 1 or simulations > MAX_SIMULATIONS_PER_REQUEST:
+        return jsonify({'error': f'Simulations must be between 1 and {MAX_SIMULATIONS_PER_REQUEST}'}), 400
     
     # Check for duplicate cards
     all_cards = []
@@ -557,15 +1038,26 @@ def simulate():
     if len(all_cards) != len(set(all_cards)):
         return jsonify({'error': 'Duplicate cards detected'}), 400
     
+    retry_after = client_budget_retry_after(request.remote_addr, simulations)
+    if retry_after is not None:
+        return server_busy_response(retry_after, 'Simulation limit reached, please retry later')
+    
     try:
-        probabilities = simulate_win_probabilities(player_hands, community_cards, simulations)
-        hand_types = get_hand_type(player_hands, community_cards)
-        return jsonify({
+        probabilities, samples = cached_win_probabilities(player_hands, community_cards, simulations, variant,
+                                                          client=request.remote_addr)
+        hand_types = get_hand_type(player_hands, community_cards, variant)
+        response = {
             'probabilities': probabilities,
+            'samples': samples,
             'hand_types': hand_types,
             'player_hands': player_hands,
-            'community_cards': community_cards
-        })
+            'community_cards': community_cards,
+            'variant': variant
+        }
+        if include_breakdown:
+            with _simulation_slots:
+                response['breakdown'] = next_card_breakdown(player_hands, community_cards, variant)
+        return jsonify(response)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -581,12 +1073,25 @@ def get_most_recent_buy_price(player_index):
     # If no buy transaction found, return None
     return None
 
-def get_dynamic_hand_prices_and_probs():
+def get_dynamic_hand_prices_and_probs(breakdown=None):
+    """Prices and win probabilities for the session's hands.
+
+    On the flop and turn the probabilities are the exact equities from the
+    next-card breakdown; pass one in when it has already been computed.
+    """
     hands = session.get('hands', [])
     community_cards = session.get('community_cards', [])
+    variant = session.get('variant', DEFAULT_VARIANT)
     if not hands:
         return [], [], []
-    probabilities = simulate_win_probabilities(hands, community_cards, simulations=2000)
+    
+    if len(community_cards) in (3, 4):
+        if breakdown is None:
+            with _simulation_slots:
+                breakdown = next_card_breakdown(hands, community_cards, variant)
+        probabilities = breakdown['equities']
+    else:
+        probabilities, _ = cached_win_probabilities(hands, community_cards, simulations=2000, variant=variant)
     
     # Check if game is over (all 5 community cards dealt)
     if len(community_cards) == 5:
@@ -620,6 +1125,7 @@ def get_dynamic_hand_prices_and_probs():
     return buy_prices, sell_prices, probabilities
 
 @app.route('/api/hand-prices')
+@admission_controlled
 def hand_prices():
     """Return current hand prices and win probabilities"""
     validate_session_state()
@@ -631,6 +1137,7 @@ def hand_prices():
     return jsonify({'buy_prices': buy_prices, 'sell_prices': sell_prices, 'probabilities': probabilities})
 
 @app.route('/api/next-community', methods=['POST'])
+@admission_controlled
 def next_community():
     """Deal next community card(s) and update hand values"""
     try:
@@ -672,28 +1179,32 @@ def next_community():
         
         # Get updated prices and probabilities using the same function as hand-prices endpoint
         hands = session.get('hands', [])
-        buy_prices, sell_prices, probabilities = get_dynamic_hand_prices_and_probs()
+        with _simulation_slots:
+            breakdown = next_card_breakdown(hands, community_cards, session['variant'])
+        buy_prices, sell_prices, probabilities = get_dynamic_hand_prices_and_probs(breakdown)
         
         hand_data = []
         for i, hand in enumerate(hands):
             # Get hand type if we have at least 3 community cards
             hand_type = None
             if len(community_cards) >= 3:
-                hand_type = get_hand_type([hand], community_cards)[0]
+                hand_type = get_hand_type([hand], community_cards, session['variant'])[0]
             
             hand_data.append({
                 'player': i + 1,
                 'cards': hand,
-                'strength': calculate_hand_strength(hand),
+                'strength': calculate_hand_strength(hand, len(hands) - 1),
                 'price': buy_prices[i] if i < len(buy_prices) else 0,
                 'sell_price': sell_prices[i] if i < len(sell_prices) else 0,
                 'probability': probabilities[i] if i < len(probabilities) else 0,
-                'hand_type': hand_type
+                'hand_type': hand_type,
+                'outs': breakdown['outs'][i] if breakdown else None
             })
         
         return jsonify({
             'hands': hand_data,
             'community_cards': community_cards,
+            'breakdown': breakdown,
             'balance': session.get('balance'),
             'owned_hand': session.get('owned_hand')
         })
@@ -702,38 +1213,28 @@ def next_community():
         print(f"Error in next_community: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
-def get_hand_type(player_hands, community_cards):
+def get_hand_type(player_hands, community_cards, variant=DEFAULT_VARIANT):
     """Get the hand type/rank for each player based on their current best 5-card hand"""
-    evaluator = Evaluator()
     hand_types = []
     
+    if len(community_cards) >= 3:
+        # Post-flop (at least 3 community cards) – score all players on the board in one batch
+        prepared_hands = prepare_hands([cards_to_treys(hand) for hand in player_hands], variant)
+        scores = score_hands(prepared_hands, cards_to_treys(community_cards), variant)
+        for score in scores:
+            hand_rank = EVALUATOR.get_rank_class(score)
+            hand_types.append({
+                'name': HAND_RANKS.get(hand_rank, "Unknown")
+            })
+        return hand_types
+    
     for hand in player_hands:
-        # Convert cards from uppercase format (AH) to treys format (Ah)
-        hand_eval = []
-        for card in hand:
-            card_treys = card[0] + card[1].lower()
-            hand_eval.append(Card.new(card_treys))
-        
-        community_eval = []
-        for card in community_cards:
-            card_treys = card[0] + card[1].lower()
-            community_eval.append(Card.new(card_treys))
-        
-        if len(community_cards) >= 3:
-            # Post-flop (at least 3 community cards) – use treys evaluator for full 5-card analysis
-            try:
-                hand_score = evaluator.evaluate(hand_eval, community_eval)
-                hand_rank = evaluator.get_rank_class(hand_score)
-                hand_name = HAND_RANKS.get(hand_rank, "Unknown")
-            except Exception:
-                hand_name = "High Card"
+        # Pre-flop – only hole cards available. Classify basic categories.
+        ranks = [card[0] for card in hand]
+        if len(set(ranks)) < len(ranks):
+            hand_name = "Pair"
         else:
-            # Pre-flop – only 2 hole cards available. Classify basic categories.
-            rank1, rank2 = hand[0][0], hand[1][0]
-            if rank1 == rank2:
-                hand_name = "Pair"
-            else:
-                hand_name = "High Card"
+            hand_name = "High Card"
         
         hand_types.append({
             'name': hand_name
@@ -753,5 +1254,140 @@ def get_download_history():
         'game_history': session.get('full_game_history', [])
     })
 
+# Starting hand classes warmed up by default: every pair plus suited and
+# offsuit broadway hands
+WARM_UP_HAND_CLASSES = (
+    [rank + rank for rank in VALID_RANKS] +
+    [a + b + kind for a, b in combinations('AKQJT', 2) for kind in 'so']
+)
+
+# Flop textures warmed for each preflop matchup: dry high, connected, low and
+# paired boards, each as rainbow, two-tone and (when possible) monotone. The
+# suit pattern gives each board card's suit by index; concrete suits are
+# picked per matchup to avoid the hole cards.
+WARM_UP_FLOP_TEXTURES = (
+    [(ranks, pattern) for ranks in ('AK7', 'JT9', '852') for pattern in ((0, 1, 2), (0, 0, 1), (0, 0, 0))] +
+    [('KK4', (0, 1, 2)), ('KK4', (0, 1, 0))]
+)
+
+def texture_flop(ranks, pattern, used_cards):
+    """Concrete flop (e.g. ['AS', 'KS', '7H']) for a rank and suit pattern, avoiding used cards"""
+    for suits in permutations('SHDC', 3):
+        flop = [rank + suits[i] for rank, i in zip(ranks, pattern)]
+        if len(set(flop)) == 3 and not set(flop) & set(used_cards):
+            return flop
+    return None
+
+def heads_up_flop_spots(preflop_spots):
+    """Every warm-up flop texture for each heads-up preflop matchup, deduplicated canonically"""
+    spots = {}
+    for hands in preflop_spots:
+        used_cards = hands[0] + hands[1]
+        for ranks, pattern in WARM_UP_FLOP_TEXTURES:
+            flop = texture_flop(ranks, pattern, used_cards)
+            if flop is None:
+                continue
+            state, _ = canonical_state(hands, flop)
+            spots.setdefault(state, (hands, flop))
+    return list(spots.values())
+
+def heads_up_preflop_spots(hand_classes):
+    """Every suit-distinct heads-up preflop matchup between the given classes"""
+    spots = {}
+    for class1, class2 in combinations_with_replacement(hand_classes, 2):
+        for hand1 in hand_class_combos(class1):
+            for hand2 in hand_class_combos(class2):
+                if set(hand1) & set(hand2):
+                    continue
+                state, _ = canonical_state([hand1, hand2], [])
+                spots.setdefault(state, [hand1, hand2])
+    return list(spots.values())
+
+@app.cli.command('warm-cache')
+@click.option('--simulations', default=10000, show_default=True,
+              help='Samples per spot; serves any request for up to this many samples')
+@click.option('--all-classes', is_flag=True, help='Warm all 169 starting hand classes instead of pairs and broadways')
+@click.option('--flops/--no-flops', default=True, show_default=True, help='Also warm flop textures for each matchup')
+def warm_cache(simulations, all_classes, flops):
+    """Pre-populate the equity cache with heads-up preflop and flop spots.
+
+    Spots are cached per suit pattern, so every suit-distinct matchup is
+    warmed, along with WARM_UP_FLOP_TEXTURES for each of them. The default
+    of 10,000 samples matches /simulate's default and also serves trading
+    game pricing (2,000 samples).
+    """
+    if not EQUITY_CACHE_PATH:
+        raise click.ClickException('Equity cache is disabled (EQUITY_CACHE_PATH is empty)')
+    
+    spots = heads_up_preflop_spots(HAND_CLASSES if all_classes else WARM_UP_HAND_CLASSES)
+    started = time.time()
+    with click.progressbar(spots, label='Heads-up preflop spots') as bar:
+        for hands in bar:
+            cached_win_probabilities(hands, [], simulations)
+    click.echo(f"Warmed {len(spots)} preflop spots in {time.time() - started:.1f}s")
+    
+    if not flops:
+        return
+    flop_spots = heads_up_flop_spots(spots)
+    started = time.time()
+    with click.progressbar(flop_spots, label='Heads-up flop spots') as bar:
+        for hands, flop in bar:
+            cached_win_probabilities(hands, flop, simulations)
+    click.echo(f"Warmed {len(flop_spots)} flop spots in {time.time() - started:.1f}s")
+
+def preflop_class_equity(hand_class, opponents, samples):
+    """All-in equity (%) of a starting hand class against random opponents.
+
+    Every hand of a class has the same equity against random hands, so one
+    representative hand is sampled against random opponents and boards.
+    """
+    hero = cards_to_treys(hand_class_combos(hand_class)[0])
+    prepared_hero = prepare_hands([hero])[0]
+    deck = [card for card in Deck.GetFullDeck() if card not in hero]
+    
+    share = 0
+    for _ in range(samples):
+        dealt = random.sample(deck, 2 * opponents + 5)
+        villains = [dealt[i:i + 2] for i in range(0, 2 * opponents, 2)]
+        scores = score_hands([prepared_hero] + prepare_hands(villains), dealt[2 * opponents:])
+        best = min(scores)
+        if scores[0] == best:
+            share += 1 / scores.count(best)
+    return share / samples * 100
+
+def preflop_vs_random_row(args):
+    """Table row for one hand class: equities against 1..PREFLOP_MAX_OPPONENTS opponents"""
+    hand_class, samples = args
+    return [round(preflop_class_equity(hand_class, opponents, samples) * 100)
+            for opponents in range(1, PREFLOP_MAX_OPPONENTS + 1)]
+
+@app.cli.command('build-preflop-table')
+@click.option('--samples', default=20000, show_default=True, help='Samples per hand class and opponent count')
+@click.option('--processes', default=os.cpu_count(), show_default=True, help='Worker processes')
+@click.option('--output', default=PREFLOP_TABLE_PATH, show_default=True, help='Table file to write')
+def build_preflop_table(samples, processes, output):
+    """Compute equities for all 169 starting hand classes and write the preflop table"""
+    num_classes = len(HAND_CLASSES)
+    
+    with multiprocessing.Pool(processes) as pool:
+        vs_random = []
+        rows = pool.imap(preflop_vs_random_row, [(hand_class, samples) for hand_class in HAND_CLASSES])
+        with click.progressbar(rows, length=num_classes, label='Against random opponents') as bar:
+            for row in bar:
+                vs_random.extend(row)
+    
+    data = struct.pack(PREFLOP_TABLE_HEADER, PREFLOP_TABLE_MAGIC, PREFLOP_TABLE_VERSION,
+                       PREFLOP_MAX_OPPONENTS, num_classes)
+    data += struct.pack(f'<{len(vs_random)}H', *vs_random)
+    
+    # Write atomically so running workers never load a partial table
+    directory = os.path.dirname(output) or '.'
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+        f.write(data)
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, output)
+    click.echo(f"Wrote {len(data)} bytes to {output}")
+
 if __name__ == '__main__':
     app.run(debug=True, port=8081) 
\ No newline at end of file
@@ -0,0 +1,7 @@
+import os
+
+# Threaded workers so the admission queue in app.py can shed simulation
+# bursts while cheap endpoints keep a free thread. SERVER_THREADS is also
+# read by app.py to check the admission limits against this thread count.
+worker_class = 'gthread'
+threads = int(os.environ.get('SERVER_THREADS', 8))
@@ -10,6 +10,7 @@ let gameState = {
     sessionStartBalance: 0,         // Balance after last "Generate Hands" action
     previousPrices: [],             // Track previous prices for animation
     leverage: 1,                    // Current leverage multiplier (1x to 10x)
+    variant: 'holdem',              // Game variant of the current hands ('holdem' or 'plo')
     messageLog: []                  // Store all messages for download
 };
 
@@ -260,6 +261,17 @@ function setupEventListeners() {
 }
 
 // Trading Game Functions
+function updateVariantHeader() {
+    const header = document.querySelector('.texas-header');
+    if (header) {
+        header.textContent = gameState.variant === 'plo' ? 'Pot-Limit Omaha' : "Texas Hold'em";
+    }
+    const variantSelect = document.getElementById('variant-select');
+    if (variantSelect) {
+        variantSelect.value = gameState.variant;
+    }
+}
+
 async function loadGameState() {
     try {
         const response = await fetch('/api/game-state');
@@ -269,6 +281,8 @@ async function loadGameState() {
         gameState.gameHistory = data.game_history;  // This is display history (last 20)
         gameState.fullGameHistory = data.full_game_history;  // Full history for downloads
         gameState.leverage = data.leverage || 1;
+        gameState.variant = data.variant || 'holdem';
+        updateVariantHeader();
         if (!gameState.sessionStartBalance) {
             gameState.sessionStartBalance = data.balance;
         }
@@ -334,6 +348,8 @@ async function generateNewHands() {
 
     const slider = document.getElementById('num-players-slider');
     const num = slider ? parseInt(slider.value) : 3;
+    const variantSelect = document.getElementById('variant-select');
+    const variant = variantSelect ? variantSelect.value : 'holdem';
     
     if (isNaN(num) || num < 2 || num > 10) {
         showMessage('Please enter a valid number between 2 and 10', 'error');
@@ -346,7 +362,7 @@ async function generateNewHands() {
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ num_players: num })
+            body: JSON.stringify({ num_players: num, variant: variant })
         });
         
         const data = await response.json();
@@ -358,6 +374,8 @@ async function generateNewHands() {
         
         gameState.currentHands = data.hands;
         gameState.balance = data.balance;
+        gameState.variant = data.variant || variant;
+        updateVariantHeader();
         gameState.communityCards = [];
         gameState.ownedHand = null;
         gameState.gameHistory = data.game_history || gameState.gameHistory;
@@ -1572,6 +1590,20 @@ async function nextCommunityCard() {
             }
         }, 300);
         
+        // Show which next cards help the owned hand unless it is already ahead
+        const ownedOuts = data.hands[gameState.ownedHand].outs;
+        const ownedStanding = data.breakdown ? data.breakdown.status[gameState.ownedHand] : null;
+        if (ownedOuts && ownedStanding !== 'win') {
+            setTimeout(() => {
+                const nextStreet = gameState.communityCards.length === 3 ? 'turn' : 'river';
+                if (ownedOuts.length > 0) {
+                    showMessage(`${ownedOuts.length} ${nextStreet} cards put your hand ahead or level: ${ownedOuts.map(formatCardForDisplay).join(' ')}`, 'info');
+                } else {
+                    showMessage(`No ${nextStreet} card puts your hand ahead`, 'info');
+                }
+            }, 1200);
+        }
+        
         // Check if game is over and we have a winning hand
         if (gameState.communityCards.length === 5 && gameState.ownedHand !== null) {
             setTimeout(async () => {
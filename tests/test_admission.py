@@ -0,0 +1,165 @@
+import threading
+import time
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def slow_simulations(monkeypatch):
+    monkeypatch.setattr(app, 'EQUITY_CACHE_PATH', '')
+    monkeypatch.setattr(app, 'SIMULATION_WORKERS', 1)
+    monkeypatch.setattr(app, 'SIMULATION_QUEUE_SIZE', 1)
+    monkeypatch.setattr(app, '_simulation_slots', threading.BoundedSemaphore(1))
+    calls = []
+    
+    def slow(player_hands, *args):
+        calls.append(player_hands)
+        time.sleep(0.5)
+        return [50.0] * len(player_hands)
+    monkeypatch.setattr(app, 'simulate_win_probabilities', slow)
+    return calls
+
+
+def post_concurrently(payloads):
+    results = [None] * len(payloads)
+    
+    def post(i, payload):
+        results[i] = app.app.test_client().post('/simulate', json=payload)
+    threads = [threading.Thread(target=post, args=(i, p)) for i, p in enumerate(payloads)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_burst_is_shed_while_cheap_endpoints_respond(slow_simulations):
+    payloads = [
+        {'player_hands': [['AS', 'KS'], ['QH', rank + 'D']], 'simulations': 1000}
+        for rank in 'J98765'
+    ]
+    threads, results = post_concurrently(payloads)
+    time.sleep(0.1)
+    
+    started = time.time()
+    response = app.app.test_client().get('/api/game-state')
+    assert response.status_code == 200
+    assert time.time() - started < 0.25
+    
+    for thread in threads:
+        thread.join()
+    statuses = [r.status_code for r in results]
+    assert statuses.count(200) == 2
+    assert statuses.count(429) == 4
+    for r in results:
+        if r.status_code == 429:
+            assert r.headers['Retry-After'] == str(app.SIMULATION_RETRY_AFTER)
+
+
+@pytest.fixture
+def fresh_budget(monkeypatch):
+    monkeypatch.setattr(app, '_client_usage', {})
+    monkeypatch.setattr(app, 'CLIENT_SIMULATION_BUDGET', 5000)
+
+
+def test_coalesce_runs_once_and_shares_result():
+    started = threading.Event()
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return 'result'
+    
+    results = []
+    leader = threading.Thread(target=lambda: results.append(app.coalesce('key', compute)))
+    leader.start()
+    started.wait()
+    waiters = [threading.Thread(target=lambda: results.append(app.coalesce('key', compute))) for _ in range(4)]
+    for thread in waiters:
+        thread.start()
+    for thread in [leader] + waiters:
+        thread.join()
+    
+    assert calls == [1]
+    assert results == ['result'] * 5
+    assert app._inflight_calls == {}
+
+
+def test_coalesce_shares_errors_with_waiters():
+    started = threading.Event()
+    
+    def compute():
+        started.set()
+        time.sleep(0.2)
+        raise ValueError('boom')
+    
+    errors = []
+    def call():
+        try:
+            app.coalesce('failing', compute)
+        except ValueError as e:
+            errors.append(str(e))
+    
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    waiter = threading.Thread(target=call)
+    waiter.start()
+    leader.join()
+    waiter.join()
+    assert errors == ['boom', 'boom']
+
+
+def test_identical_concurrent_requests_simulate_once_in_each_order(slow_simulations, monkeypatch):
+    monkeypatch.setattr(app, 'SIMULATION_QUEUE_SIZE', 5)
+    
+    def ace_king_wins(player_hands, *args):
+        slow_simulations.append(player_hands)
+        time.sleep(0.3)
+        return [70.0 if hand[0][0] in 'AK' else 30.0 for hand in player_hands]
+    monkeypatch.setattr(app, 'simulate_win_probabilities', ace_king_wins)
+    payloads = [
+        {'player_hands': [['AS', 'KS'], ['QH', 'QD']], 'simulations': 1000},
+        {'player_hands': [['QC', 'QS'], ['KH', 'AH']], 'simulations': 1000},
+    ] * 3
+    threads, results = post_concurrently(payloads)
+    for thread in threads:
+        thread.join()
+    
+    assert len(slow_simulations) == 1
+    for payload, response in zip(payloads, results):
+        probabilities = response.get_json()['probabilities']
+        ace_player = 0 if payload['player_hands'][0][0][0] in 'AK' else 1
+        assert probabilities[ace_player] == 70.0
+        assert probabilities[1 - ace_player] == 30.0
+
+
+def test_budget_only_charges_simulated_samples(slow_simulations, fresh_budget, monkeypatch):
+    monkeypatch.setattr(app, 'SIMULATION_QUEUE_SIZE', 5)
+    payload = {'player_hands': [['AS', 'KS'], ['QH', 'QD']], 'simulations': 4000}
+    threads, results = post_concurrently([payload] * 5)
+    for thread in threads:
+        thread.join()
+    
+    assert [r.status_code for r in results] == [200] * 5
+    assert app._client_usage['127.0.0.1'][1] == 4000
+    
+    # A distinct spot that no longer fits is rejected with the time left in the window
+    response = app.app.test_client().post('/simulate', json={
+        'player_hands': [['2S', '3S'], ['4H', '5D']], 'simulations': 2000
+    })
+    assert response.status_code == 429
+    assert 1 <= int(response.headers['Retry-After']) <= app.CLIENT_BUDGET_WINDOW
+
+
+def test_budget_window_resets(fresh_budget, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(app.time, 'time', lambda: now[0])
+    app.charge_client_simulations('client', 5000)
+    assert app.client_budget_retry_after('client', 1) == app.CLIENT_BUDGET_WINDOW + 1
+    assert app.client_budget_retry_after('other', 5000) is None
+    
+    now[0] += app.CLIENT_BUDGET_WINDOW
+    assert app.client_budget_retry_after('client', 5000) is None
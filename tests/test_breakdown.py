@@ -0,0 +1,78 @@
+from itertools import combinations
+
+from treys import Card, Deck
+
+import app
+
+
+def brute_force_card_equities(player_hands, community_cards):
+    """Equity of each player after each possible next card, straight from treys"""
+    hands = [app.cards_to_treys(hand) for hand in player_hands]
+    board = app.cards_to_treys(community_cards)
+    known_cards = set(card for hand in hands for card in hand) | set(board)
+    deck = [card for card in Deck.GetFullDeck() if card not in known_cards]
+    
+    def shares(full_board):
+        scores = [app.EVALUATOR.evaluate(hand, full_board) for hand in hands]
+        best = min(scores)
+        winners = scores.count(best)
+        return [100 / winners if score == best else 0 for score in scores]
+    
+    equities = {}
+    for card in deck:
+        if len(board) == 4:
+            equities[Card.int_to_str(card).upper()] = shares(board + [card])
+        else:
+            rivers = [shares(board + [card, river]) for river in deck if river != card]
+            equities[Card.int_to_str(card).upper()] = [
+                sum(river[i] for river in rivers) / len(rivers) for i in range(len(hands))
+            ]
+    return equities
+
+
+def check_against_brute_force(player_hands, community_cards):
+    breakdown = app.next_card_breakdown(player_hands, community_cards)
+    expected = brute_force_card_equities(player_hands, community_cards)
+    
+    assert len(breakdown['runouts']) == len(expected)
+    for runout in breakdown['runouts']:
+        assert runout['equities'] == [round(e, 2) for e in expected[runout['card']]]
+    for i in range(len(player_hands)):
+        average = sum(e[i] for e in expected.values()) / len(expected)
+        assert breakdown['equities'][i] == round(average, 2)
+
+
+def test_turn_breakdown_matches_brute_force():
+    check_against_brute_force([['AS', 'KS'], ['JH', 'JD'], ['7C', '8C']], ['2H', '7D', '9C', '3S'])
+
+
+def test_flop_breakdown_matches_brute_force():
+    check_against_brute_force([['AS', 'KS'], ['QH', 'QD']], ['2S', '7H', '9S'])
+
+
+def test_outs_take_a_trailing_player_ahead():
+    breakdown = app.next_card_breakdown([['AS', 'KS'], ['JH', 'JD']], ['2H', '7D', '9C', '3S'])
+    
+    assert breakdown['status'] == ['lose', 'win']
+    assert sorted(breakdown['outs'][0]) == ['AC', 'AD', 'AH', 'KC', 'KD', 'KH']
+    # The leader cannot improve on winning, so blanks are not outs
+    assert breakdown['outs'][1] == []
+
+
+def test_flop_outs_use_standing_after_the_turn():
+    breakdown = app.next_card_breakdown([['AS', 'KS'], ['QH', 'QD']], ['2S', '7H', '9S'])
+    
+    assert breakdown['status'] == ['lose', 'win']
+    # Aces, kings and spades put AKs ahead on the turn
+    expected = {'AH', 'AD', 'AC', 'KH', 'KD', 'KC'} | {rank + 'S' for rank in '345678TJQ'}
+    assert set(breakdown['outs'][0]) == expected
+    assert breakdown['outs'][1] == []
+
+
+def test_outs_break_a_split_pot():
+    # Both players make A-K-Q-J-7; pairing either low card breaks the tie
+    breakdown = app.next_card_breakdown([['AH', '3D'], ['AC', '2S']], ['KS', 'QD', 'JH', '7C'])
+    
+    assert breakdown['status'] == ['tie', 'tie']
+    assert sorted(breakdown['outs'][0]) == ['3C', '3H', '3S']
+    assert sorted(breakdown['outs'][1]) == ['2C', '2D', '2H']
@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def equity_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'EQUITY_CACHE_PATH', str(tmp_path / 'equity_cache.sqlite3'))
+    monkeypatch.setattr(app._cache_local, 'conn', None, raising=False)
+    yield
+    app._cache_local.conn.close()
+    app._cache_local.conn = None
+
+
+def test_canonical_state_ignores_suits_and_ordering():
+    hands = [['AS', 'KS'], ['QH', 'QD']]
+    # Hearts <-> spades, clubs <-> diamonds, players swapped, cards reordered
+    same_hands = [['QC', 'QS'], ['KH', 'AH']]
+    key, order = app.canonical_state(hands, ['2S', '7H', '9C'])
+    same_key, same_order = app.canonical_state(same_hands, ['9D', '2H', '7S'])
+    
+    assert same_key == key
+    # Each canonical position maps back to the corresponding player
+    for position in range(2):
+        assert sorted(card[0] for card in hands[order[position]]) == \
+            sorted(card[0] for card in same_hands[same_order[position]])
+
+
+def test_canonical_state_distinguishes_suit_patterns():
+    suited, _ = app.canonical_state([['AS', 'KS'], ['QH', 'QD']], [])
+    offsuit, _ = app.canonical_state([['AS', 'KH'], ['QH', 'QD']], [])
+    assert suited != offsuit
+
+
+def test_cached_equities_map_back_to_player_order(equity_cache, monkeypatch):
+    monkeypatch.setattr(app, 'simulate_win_probabilities', lambda hands, *args: [70.0, 30.0])
+    assert app.cached_win_probabilities([['AS', 'KS'], ['QH', 'QD']], [], 1000) == ([70.0, 30.0], 1000)
+    
+    def fail(*args):
+        raise AssertionError('expected a cache hit')
+    monkeypatch.setattr(app, 'simulate_win_probabilities', fail)
+    
+    # Same spot with players swapped and suits relabelled
+    assert app.cached_win_probabilities([['QC', 'QS'], ['KH', 'AH']], [], 1000) == ([30.0, 70.0], 1000)
+    # A less accurate request is served by the more accurate entry
+    assert app.cached_win_probabilities([['AS', 'KS'], ['QH', 'QD']], [], 500) == ([70.0, 30.0], 1000)
+
+
+def test_cache_miss_for_more_samples(equity_cache, monkeypatch):
+    monkeypatch.setattr(app, 'simulate_win_probabilities', lambda hands, *args: [70.0, 30.0])
+    app.cached_win_probabilities([['AS', 'KS'], ['QH', 'QD']], [], 1000)
+    monkeypatch.setattr(app, 'simulate_win_probabilities', lambda hands, *args: [71.0, 29.0])
+    assert app.cached_win_probabilities([['AS', 'KS'], ['QH', 'QD']], [], 5000) == ([71.0, 29.0], 5000)
+
+
+def test_evict_drops_least_recently_used(equity_cache, monkeypatch):
+    monkeypatch.setattr(app, 'EQUITY_CACHE_MAX_ENTRIES', 2)
+    for i, state in enumerate(['old', 'newer', 'newest']):
+        app.store_cached_equities(state, 1000, [50.0, 50.0])
+        app.get_cache_connection().execute(
+            'UPDATE equity_cache SET last_used = ? WHERE state = ?', (i, state)
+        )
+    
+    app.evict_cached_equities(app.get_cache_connection())
+    
+    assert app.get_cached_equities('old', 1000) is None
+    assert app.get_cached_equities('newer', 1000) is not None
+    assert app.get_cached_equities('newest', 1000) is not None
+
+
+def test_cache_uses_wal_mode(equity_cache):
+    mode = app.get_cache_connection().execute('PRAGMA journal_mode').fetchone()[0]
+    assert mode == 'wal'
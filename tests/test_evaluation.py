@@ -0,0 +1,40 @@
+import random
+from itertools import combinations
+
+from treys import Deck
+
+import app
+
+
+def random_deal(hole_cards, num_players, board_size):
+    deck = Deck.GetFullDeck()
+    random.shuffle(deck)
+    hands = [deck[i * hole_cards:(i + 1) * hole_cards] for i in range(num_players)]
+    board = deck[num_players * hole_cards:num_players * hole_cards + board_size]
+    return hands, board
+
+
+def test_holdem_scores_match_treys():
+    random.seed(26)
+    for board_size in (3, 4, 5):
+        for _ in range(300):
+            hands, board = random_deal(2, 3, board_size)
+            scores = app.score_hands(app.prepare_hands(hands, 'holdem'), board, 'holdem')
+            assert scores == [app.EVALUATOR.evaluate(hand, board) for hand in hands]
+
+
+def test_omaha_scores_match_best_two_plus_three():
+    random.seed(26)
+    for board_size in (3, 4, 5):
+        for _ in range(300):
+            hands, board = random_deal(4, 3, board_size)
+            scores = app.score_hands(app.prepare_hands(hands, 'plo'), board, 'plo')
+            expected = [
+                min(
+                    app.EVALUATOR.evaluate(list(hole), list(triple))
+                    for hole in combinations(hand, 2)
+                    for triple in combinations(board, 3)
+                )
+                for hand in hands
+            ]
+            assert scores == expected
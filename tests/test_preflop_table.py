@@ -0,0 +1,63 @@
+import struct
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def preflop_table(tmp_path, monkeypatch):
+    """Point the loader at a temporary table file; returns its path"""
+    path = tmp_path / 'preflop_equity.bin'
+    monkeypatch.setattr(app, 'PREFLOP_TABLE_PATH', str(path))
+    monkeypatch.setattr(app, '_preflop_table', None)
+    return path
+
+
+def write_table(path, magic=app.PREFLOP_TABLE_MAGIC, version=app.PREFLOP_TABLE_VERSION):
+    num_classes = len(app.HAND_CLASSES)
+    data = struct.pack(app.PREFLOP_TABLE_HEADER, magic, version, 1, num_classes)
+    data += struct.pack(f'<{num_classes}H', *range(num_classes))
+    path.write_bytes(data)
+
+
+def test_hand_class_combos_round_trip():
+    assert len(set(app.HAND_CLASSES)) == 169
+    seen = set()
+    for index, hand_class in enumerate(app.HAND_CLASSES):
+        combos = app.hand_class_combos(hand_class)
+        assert len(combos) == (6 if len(hand_class) == 2 else 4 if hand_class.endswith('s') else 12)
+        for combo in combos:
+            assert app.hand_class_index(combo) == index
+            assert app.hand_class_index(combo[::-1]) == index
+            seen.add(frozenset(combo))
+    assert len(seen) == 1326
+
+
+def test_load_preflop_table(preflop_table):
+    write_table(preflop_table)
+    assert app.preflop_equity(['AS', 'AH']) == 0
+    assert app.preflop_equity(['7H', '2C']) == app.HAND_CLASSES.index('72o') / 100
+    # Out of range opponent counts and Omaha hands have no entry
+    assert app.calculate_hand_strength(['AS', 'KS'], 0) is None
+    assert app.calculate_hand_strength(['AS', 'KS'], 2) is None
+    assert app.calculate_hand_strength(['AS', 'KS', 'QS', 'JS']) is None
+
+
+@pytest.mark.parametrize('magic, version', [
+    (b'XXXX', app.PREFLOP_TABLE_VERSION),
+    (app.PREFLOP_TABLE_MAGIC, app.PREFLOP_TABLE_VERSION - 1),
+])
+def test_load_preflop_table_rejects_unknown_format(preflop_table, magic, version):
+    write_table(preflop_table, magic, version)
+    assert app.load_preflop_table() is None
+    assert app.calculate_hand_strength(['AS', 'AH']) is None
+
+
+def test_load_preflop_table_missing_or_truncated(preflop_table):
+    assert app.load_preflop_table() is None
+
+    app._preflop_table = None
+    write_table(preflop_table)
+    preflop_table.write_bytes(preflop_table.read_bytes()[:-2])
+    assert app.load_preflop_table() is None